@@ -1,5 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
+import zstandard as zstd
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
 import time
 import random
 import concurrent.futures
@@ -8,20 +13,92 @@ from typing import Optional, Tuple, List
 import json
 from urllib.parse import urlparse
 import os
+import re
+import functools
+import atexit
+import threading
+import queue
+import sqlite3
 
 # Set up logging
+# The log file only keeps warnings and errors; per-case progress goes to the console
+file_handler = logging.FileHandler('scraper.log', delay=True)
+file_handler.setLevel(logging.WARNING)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('scraper.log'),
+        file_handler,
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+URL_TMPL = "https://indiankanoon.org/doc/{}/".format
+
+# The site sometimes serves its "too many requests" page with a 200 status
+_RATE_LIMIT_SIG = re.compile(rb"requesting too many|too many requests|slow down", re.I)
+RATE_LIMIT_BACKOFF = (10.0, 120.0)
+
+# Collapses blank lines and the whitespace around line breaks left by text_content()
+_NL_COLLAPSE = re.compile(r"[ \t]*\n\s*")
+
+# Bounds for the adaptive delay between requests, and how many consecutive
+# successes earn a 10% shorter delay
+MIN_DELAY = 0.5
+MAX_DELAY = 60.0
+SUCCESS_STREAK = 20
+
+# Status values stored in the state database
+STATUS_FAILED = 0
+STATUS_PROCESSED = 1
+
+# Title and judgment nodes, found together in a single document-order traversal
+CASE_XPATH = etree.XPath(
+    "(//h1)[1] | //div[contains(concat(' ', normalize-space(@class), ' '), ' judgments ')]"
+)
+# Block-level elements inside a judgment that should end a line of text
+BLOCK_XPATH = etree.XPath(".//p | .//br | .//pre | .//blockquote | .//div | .//li")
+
+
+@functools.lru_cache(maxsize=None)
+def _html_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """HTML parser that decodes pages with the given charset, cached per charset"""
+    return lxml.html.HTMLParser(encoding=encoding)
+
+
+class RateLimited(Exception):
+    """Raised when the site answers with a rate-limit page instead of a case"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 class IndianKanoonScraper:
-    def __init__(self, max_workers: int = 2, delay_range: Tuple[float, float] = (3.0, 7.0)):
+    def __init__(self, max_workers: int = 2, delay_range: Tuple[float, float] = (3.0, 7.0),
+                 filename: str = "all_cases.jsonl", flush_every: int = 50, buf_limit: int = 256 * 1024,
+                 db_path: str = "scraper.db", rate_limit_retries: int = 3):
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -31,26 +108,175 @@ class IndianKanoonScraper:
             "Upgrade-Insecure-Requests": "1",
             "Cache-Control": "max-age=0"
         })
+        # Retry transient failures with exponential backoff, honouring Retry-After
+        retry = Retry(
+            total=5,
+            backoff_factor=1.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=["GET"]
+        )
+        # Every worker thread shares this session, so the pool must fit them all
+        pool_size = max(20, max_workers)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.max_workers = max_workers
         self.delay_range = delay_range
+        self.rate_limit_retries = rate_limit_retries
+        self._backoff = RATE_LIMIT_BACKOFF[0]
+        # Adaptive delay: starts at the top of delay_range, shrinks by 10% every
+        # SUCCESS_STREAK clean responses and doubles on every rate limit
+        self._min_delay = max(delay_range[0], MIN_DELAY)
+        self._delay = max(delay_range[1], self._min_delay)
+        self._success_streak = 0
         self.processed_ids = set()
         self.failed_ids = set()
         self.proxies = self.load_proxies()
         self.proxy_index = 0
-        
-        # Load already processed IDs to resume from where we left off
-        try:
-            with open("processed_ids.txt", "r") as f:
-                self.processed_ids = set(int(line.strip()) for line in f if line.strip())
-        except FileNotFoundError:
-            pass
-            
-        # Load failed IDs
+
+        # Case state lives in a WAL-journaled SQLite table; writes are grouped
+        # into transactions committed on every flush
+        self.db = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.db.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "CREATE TABLE IF NOT EXISTS processed(id INTEGER PRIMARY KEY, status INT);"
+        )
+        self._import_legacy_ids()
+
+        # Load already processed and failed IDs to resume from where we left off
+        for doc_id, status in self.db.execute("SELECT id, status FROM processed"):
+            if status == STATUS_PROCESSED:
+                self.processed_ids.add(doc_id)
+            else:
+                self.failed_ids.add(doc_id)
+
+        # Keep the output file open for the whole run instead of reopening per case.
+        # Each chunk is compressed into its own zstd frame and written with pwrite
+        # at the tracked end offset; only the writer thread writes chunks
+        self.filename = filename
+        self.flush_every = flush_every
+        self._success_count = 0
+        self._lock = threading.Lock()
+        self._fd = os.open(filename + ".zst", os.O_WRONLY | os.O_CREAT, 0o644)
+        self._offset = os.fstat(self._fd).st_size
+        self._cctx = zstd.ZstdCompressor(level=6)
+        # Cases are batched in memory and written out in large chunks
+        self._out_buf = bytearray()
+        self._buf_limit = buf_limit
+        # Workers hand finished cases to a single writer thread so they never block on disk I/O
+        self._q = queue.Queue(maxsize=64)
+        self._writer = None
+        atexit.register(self.close)
+
+    def _import_legacy_ids(self):
+        """Seed an empty database from the old processed_ids.txt/failed_ids.txt logs"""
+        if self.db.execute("SELECT 1 FROM processed LIMIT 1").fetchone():
+            return
+        rows = []
+        for path, status in (("failed_ids.txt", STATUS_FAILED), ("processed_ids.txt", STATUS_PROCESSED)):
+            try:
+                with open(path, "r") as f:
+                    rows.extend((int(line), status) for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+        if rows:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR REPLACE INTO processed VALUES(?, ?)", rows)
+            self.db.execute("COMMIT")
+            logger.info("Imported %s IDs from legacy text logs", len(rows))
+
+    def _record_state(self, doc_id: int, status: int):
+        """Record a case's status; caller must hold the lock"""
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+        self.db.execute("INSERT OR REPLACE INTO processed VALUES(?, ?)", (doc_id, status))
+
+    def _take_output(self) -> bytes:
+        """Swap out the in-memory case buffer; caller must hold the lock"""
+        chunk = bytes(self._out_buf)
+        self._out_buf.clear()
+        return chunk
+
+    def _write_chunk(self, chunk: bytes):
+        """Compress a chunk into a standalone zstd frame and pwrite it at the end of the file"""
+        if not chunk or self._fd is None:
+            return
+        frame = self._cctx.compress(chunk)
+        start = offset = self._offset
+        view = memoryview(frame)
         try:
-            with open("failed_ids.txt", "r") as f:
-                self.failed_ids = set(int(line.strip()) for line in f if line.strip())
-        except FileNotFoundError:
-            pass
+            # pwrite may write less than asked (e.g. the disk filling up mid-frame)
+            while view:
+                written = os.pwrite(self._fd, view, offset)
+                if not written:
+                    raise OSError(f"Short write to {self.filename}.zst at offset {offset}")
+                view = view[written:]
+                offset += written
+        except OSError:
+            # Cut off the partial frame so the frames before it stay readable
+            os.ftruncate(self._fd, start)
+            with self._lock:
+                # Cases in this chunk were recorded as processed but are not on disk;
+                # drop the uncommitted state so the next run fetches them again
+                if self.db.in_transaction:
+                    self.db.execute("ROLLBACK")
+            raise
+        self._offset = offset
+        # Commit state as soon as its cases are on disk, so a later failed write
+        # only rolls back the cases in that chunk
+        with self._lock:
+            if self.db.in_transaction:
+                self.db.execute("COMMIT")
+
+    def flush(self):
+        """Flush buffered output to disk and commit pending state changes"""
+        with self._lock:
+            chunk = self._take_output()
+        self._write_chunk(chunk)
+        with self._lock:
+            if self.db.in_transaction:
+                self.db.execute("COMMIT")
+
+    def _start_writer(self):
+        """Start the output writer thread if it is not already running"""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="case-writer", daemon=True)
+            self._writer.start()
+
+    def _stop_writer(self):
+        """Drain the writer queue and stop the writer thread"""
+        if self._writer is not None and self._writer.is_alive():
+            self._q.put(None)
+            self._writer.join()
+        self._writer = None
+
+    def _writer_loop(self):
+        """Consume (doc_id, title, content) records from the queue until the None sentinel"""
+        while True:
+            item = self._q.get()
+            try:
+                if item is None:
+                    break
+                self._write_case(*item)
+            except Exception:
+                logger.exception("❌ Failed to write Case %s", item[0])
+            finally:
+                self._q.task_done()
+
+    def close(self):
+        """Flush and close the output file and state database"""
+        if self._fd is None:
+            return
+        self._stop_writer()
+        self.flush()
+        os.close(self._fd)
+        self._fd = None
+        # Fold the WAL into the main database so the next startup reads a
+        # single snapshot instead of replaying the journal
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.db.close()
 
     def load_proxies(self) -> List[str]:
         """Load proxies from file if available"""
@@ -58,19 +284,26 @@ class IndianKanoonScraper:
         try:
             with open("proxies.txt", "r") as f:
                 proxies = [line.strip() for line in f if line.strip()]
-            logger.info(f"Loaded {len(proxies)} proxies")
+            logger.info("Loaded %s proxies", len(proxies))
         except FileNotFoundError:
             logger.info("No proxies file found, using direct connection")
+        # Build the requests proxy mappings once rather than on every fetch
+        self._proxy_dicts = [self._to_proxy_dict(p) for p in proxies]
         return proxies
 
     def get_next_proxy(self) -> Optional[dict]:
         """Get next proxy from the list in round-robin fashion"""
-        if not self.proxies:
+        if not self._proxy_dicts:
             return None
             
-        proxy = self.proxies[self.proxy_index]
-        self.proxy_index = (self.proxy_index + 1) % len(self.proxies)
-        
+        with self._lock:
+            d = self._proxy_dicts[self.proxy_index]
+            self.proxy_index = (self.proxy_index + 1) % len(self._proxy_dicts)
+        return d
+
+    @staticmethod
+    def _to_proxy_dict(proxy: str) -> dict:
+        """Convert a proxy URL into a requests proxies mapping"""
         # Parse proxy URL to determine scheme
         parsed = urlparse(proxy)
         if parsed.scheme:
@@ -87,164 +320,238 @@ class IndianKanoonScraper:
 
     def _random_delay(self):
         """Add random delay between requests to avoid being blocked"""
-        time.sleep(random.uniform(*self.delay_range))
+        time.sleep(random.uniform(self._delay, self._delay * 1.3))
+
+    @staticmethod
+    def _was_throttled(response) -> bool:
+        """Whether the retry adapter had to back off from a 429 to get this response"""
+        retries = getattr(response.raw, "retries", None)
+        return retries is not None and any(h.status == 429 for h in retries.history)
 
-    def fetch_case(self, doc_id: int) -> Optional[Tuple[int, str, str]]:
+    def _adjust_delay(self, rate_limited: bool):
+        """Additive-increase/multiplicative-decrease tuning of the request delay"""
+        with self._lock:
+            if rate_limited:
+                self._delay = min(self._delay * 2, MAX_DELAY)
+                self._success_streak = 0
+                logger.warning("🐢 Rate limited, request delay raised to %.1fs", self._delay)
+            else:
+                self._success_streak += 1
+                if self._success_streak % SUCCESS_STREAK == 0:
+                    self._delay = max(self._delay * 0.9, self._min_delay)
+
+    def _maybe_nap(self, low: float, high: float, chance: float = 0.1):
+        """Occasionally take a longer break"""
+        if random.random() < chance:
+            nap_time = random.uniform(low, high)
+            logger.info("😴 Taking a longer nap for %.1f seconds...", nap_time)
+            time.sleep(nap_time)
+
+    def fetch_case(self, doc_id: int, retry: bool = False) -> Optional[Tuple[int, str, str]]:
         # Skip already processed IDs
         if doc_id in self.processed_ids:
-            logger.info(f"⏭️  Skipping already processed Case {doc_id}")
+            logger.info("⏭️  Skipping already processed Case %s", doc_id)
             return None
             
-        # Skip IDs that failed multiple times
-        if doc_id in self.failed_ids:
-            logger.info(f"⏭️  Skipping previously failed Case {doc_id}")
+        # Skip IDs that failed multiple times, unless explicitly retrying them
+        if not retry and doc_id in self.failed_ids:
+            logger.info("⏭️  Skipping previously failed Case %s", doc_id)
             return None
             
-        url = f"https://indiankanoon.org/doc/{doc_id}/"
+        url = URL_TMPL(doc_id)
         
         # Use proxy if available
         proxies = self.get_next_proxy()
         
-        try:
-            response = self.session.get(url, timeout=15, proxies=proxies)
-            
-            # Check for rate limiting
-            if response.status_code == 429:
-                logger.warning(f"⏸️  Rate limited on Case {doc_id}, adding delay")
-                time.sleep(random.uniform(10, 20))  # Longer delay for rate limiting
-                # Try one more time with longer delay
+        for attempt in range(self.rate_limit_retries + 1):
+            try:
+                # Rate limiting and transient errors are retried by the session adapter
                 response = self.session.get(url, timeout=15, proxies=proxies)
-                
-            response.raise_for_status()
-            
-        except requests.RequestException as e:
-            logger.warning(f"⚠️ Failed to fetch {url}: {e}")
-            # Add to failed IDs
-            self.failed_ids.add(doc_id)
-            with open("failed_ids.txt", "a") as f:
-                f.write(f"{doc_id}\n")
+                response.raise_for_status()
+                # Check for a rate-limit page before spending time parsing it
+                if _RATE_LIMIT_SIG.search(response.content[:8192]):
+                    raise RateLimited(doc_id)
+                with self._lock:
+                    self._backoff = RATE_LIMIT_BACKOFF[0]
+                self._adjust_delay(self._was_throttled(response))
+                break
+
+            except RateLimited:
+                self._adjust_delay(True)
+                if attempt == self.rate_limit_retries:
+                    logger.warning("⏸️  Rate limit page for Case %s, giving up", doc_id)
+                    continue
+                with self._lock:
+                    backoff = self._backoff
+                    self._backoff = min(self._backoff * 2, RATE_LIMIT_BACKOFF[1])
+                logger.warning("⏸️  Rate limit page for Case %s, backing off %.0fs", doc_id, backoff)
+                time.sleep(backoff)
+
+            except requests.RequestException as e:
+                logger.warning("⚠️ Failed to fetch %s: %s", url, e)
+                if isinstance(e, requests.exceptions.RetryError):
+                    # The adapter gave up on repeated 429/5xx responses
+                    self._adjust_delay(True)
+                response = None
+                break
+        else:
+            # Still rate limited after every attempt
+            response = None
+
+        if response is None:
+            # Retries exhausted, add to failed IDs
+            with self._lock:
+                self.failed_ids.add(doc_id)
+                self._record_state(doc_id, STATUS_FAILED)
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        # lxml never sees the Content-Type header, so hand it the charset requests found
+        title_tag = judgment_div = None
+        encoding = response.encoding or response.apparent_encoding
+        try:
+            nodes = CASE_XPATH(lxml.html.fromstring(response.content, parser=_html_parser(encoding)))
+        except etree.ParserError:
+            nodes = []
+        for node in nodes:
+            if node.tag == "h1":
+                title_tag = node
+            elif judgment_div is None:
+                judgment_div = node
 
         # Extract only the judgments section
-        judgment_div = soup.find("div", class_="judgments")
-        if not judgment_div:
-            logger.warning(f"⚠️ No judgment text found for Case {doc_id}")
+        if judgment_div is None:
+            logger.warning("⚠️ No judgment text found for Case %s", doc_id)
             # Mark as processed to avoid retrying
-            self.processed_ids.add(doc_id)
-            with open("processed_ids.txt", "a") as f:
-                f.write(f"{doc_id}\n")
+            with self._lock:
+                self.processed_ids.add(doc_id)
+                self._record_state(doc_id, STATUS_PROCESSED)
             return None
 
         # Extract text more efficiently
-        judgment_text = judgment_div.get_text(separator="\n", strip=True)
+        # text_content() is a single C-level walk; only block boundaries need a
+        # newline added so paragraphs do not run together
+        for block in BLOCK_XPATH(judgment_div):
+            block.tail = "\n" + (block.tail or "")
+        judgment_text = _NL_COLLAPSE.sub("\n", judgment_div.text_content().strip())
         
         # Extract case title
-        title_tag = soup.find("h1")
-        title = title_tag.get_text(strip=True) if title_tag else f"Case {doc_id}"
+        title = " ".join(title_tag.text_content().split()) if title_tag is not None else f"Case {doc_id}"
 
-        # Add to processed IDs
-        self.processed_ids.add(doc_id)
-        with open("processed_ids.txt", "a") as f:
-            f.write(f"{doc_id}\n")
+        # Add to processed IDs; the state row is written by the writer thread
+        # together with the case text
+        with self._lock:
+            self.processed_ids.add(doc_id)
 
         return doc_id, title, judgment_text
 
-    def process_single_case(self, doc_id: int, filename: str):
+    def _write_case(self, doc_id: int, title: str, content: str):
+        """Buffer a case for the output file, writing it out once the buffer is
+        full and flushing every `flush_every` cases. The case is only marked
+        processed in the database here, so a flush never commits state for a
+        case whose text has not reached the output file"""
+        payload = orjson.dumps({"id": doc_id, "title": title, "text": content}) + b"\n"
+        chunk = b""
+        with self._lock:
+            self._out_buf += payload
+            self._record_state(doc_id, STATUS_PROCESSED)
+            self._success_count += 1
+            due = self._success_count % self.flush_every == 0
+            if not due and len(self._out_buf) >= self._buf_limit:
+                chunk = self._take_output()
+        if due:
+            self.flush()
+        else:
+            self._write_chunk(chunk)
+
+    def process_single_case(self, doc_id: int):
         """Process and save a single case"""
         result = self.fetch_case(doc_id)
         if result:
-            doc_id, title, content = result
-            with open(filename, "a", encoding="utf-8") as f:
-                f.write(f"\n\n{'='*100}\n")
-                f.write(f"Case ID: {doc_id}\nTitle: {title}\n")
-                f.write(f"{'='*100}\n\n")
-                f.write(content)
-                f.write("\n\n")
-            logger.info(f"✅ Added Case {doc_id}")
+            self._q.put(result)
+            logger.info("✅ Added Case %s", doc_id)
         else:
-            logger.info(f"⚠️ Skipped Case {doc_id}")
+            logger.info("⚠️ Skipped Case %s", doc_id)
         
         # Add delay between requests
         self._random_delay()
+        self._maybe_nap(5, 8)
 
-    def save_cases(self, start: int, end: int, filename: str):
+    def _guarded_fetch(self, sem: threading.BoundedSemaphore, doc_id: int):
+        """Process a case while holding a slot of the in-flight request limit"""
+        with sem:
+            self.process_single_case(doc_id)
+
+    def save_cases(self, start: int, end: int):
         """Process cases with controlled parallelism"""
-        # Create file if it doesn't exist
-        with open(filename, "a", encoding="utf-8") as f:
-            pass
-            
         # Filter out already processed IDs
-        ids_to_process = [doc_id for doc_id in range(start, end + 1) 
-                         if doc_id not in self.processed_ids and doc_id not in self.failed_ids]
+        candidates = set(range(start, end + 1))
+        ids_to_process = sorted(candidates - self.processed_ids - self.failed_ids)
         
-        logger.info(f"📊 Processing {len(ids_to_process)} new cases out of {end - start + 1} total")
+        logger.info("📊 Processing %s new cases out of %s total", len(ids_to_process), end - start + 1)
         
-        # Use slower sequential processing to avoid rate limiting
-        for doc_id in ids_to_process:
-            self.process_single_case(doc_id, filename)
-            
-            # Occasionally take a longer break
-            if random.random() < 0.1:  # 10% chance after each request
-                nap_time = random.uniform(5, 8)
-                logger.info(f"😴 Taking a longer nap for {nap_time:.1f} seconds...")
-                time.sleep(nap_time)
-
-    def retry_failed_cases(self, filename: str, max_retries: int = 3):
-        """Retry cases that previously failed"""
+        # Overlap request latency across a small pool of workers; each worker
+        # still sleeps between its own requests to stay polite
+        self._start_writer()
+        sem = threading.BoundedSemaphore(self.max_workers)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._guarded_fetch, sem, doc_id) for doc_id in ids_to_process]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+
+    def retry_failed_cases(self, max_retries: int = 3, rate: float = 1.0):
+        """Retry cases that previously failed, overlapping requests at up to `rate` per second"""
         if not self.failed_ids:
             logger.info("No failed cases to retry")
             return
             
-        logger.info(f"🔄 Retrying {len(self.failed_ids)} failed cases")
+        logger.info("🔄 Retrying %s failed cases", len(self.failed_ids))
         
         # Make a copy as the set will change during iteration
-        failed_ids = list(self.failed_ids)
+        failed_ids = set(self.failed_ids)
+        bucket = TokenBucket(rate, capacity=self.max_workers)
+        self._start_writer()
+
+        def retry_one(doc_id: int):
+            bucket.acquire()
+            result = self.fetch_case(doc_id, retry=True)
+            # The bucket caps the rate; the adaptive delay slows workers further
+            # whenever the site is pushing back
+            self._random_delay()
+            return doc_id, result
         
-        for retry in range(max_retries):
-            logger.info(f"Retry attempt {retry + 1}/{max_retries}")
-            success_count = 0
-            
-            for doc_id in failed_ids[:]:  # Iterate over copy
-                result = self.fetch_case(doc_id)
-                if result:
-                    doc_id, title, content = result
-                    with open(filename, "a", encoding="utf-8") as f:
-                        f.write(f"\n\n{'='*100}\n")
-                        f.write(f"Case ID: {doc_id}\nTitle: {title}\n")
-                        f.write(f"{'='*100}\n\n")
-                        f.write(content)
-                        f.write("\n\n")
-                    logger.info(f"✅ Added previously failed Case {doc_id}")
-                    success_count += 1
-                    # Remove from failed list
-                    failed_ids.remove(doc_id)
-                
-                # Add delay between requests
-                self._random_delay()
-                
-                # Occasionally take a longer break
-                if random.random() < 0.1:
-                    nap_time = random.uniform(10, 30)
-                    logger.info(f"😴 Taking a longer nap for {nap_time:.1f} seconds...")
-                    time.sleep(nap_time)
-            
-            logger.info(f"Retry {retry + 1}: Successfully processed {success_count} cases")
-            if not failed_ids:
-                break
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for retry in range(max_retries):
+                logger.info("Retry attempt %s/%s", retry + 1, max_retries)
+                success_count = 0
+
+                futures = [executor.submit(retry_one, doc_id) for doc_id in sorted(failed_ids)]
+                for future in concurrent.futures.as_completed(futures):
+                    doc_id, result = future.result()
+                    if result:
+                        self._q.put(result)
+                        logger.info("✅ Added previously failed Case %s", doc_id)
+                        success_count += 1
+                    # Remove from failed list once resolved (fetched or empty)
+                    if doc_id in self.processed_ids:
+                        failed_ids.discard(doc_id)
+
+                logger.info("Retry %s: Successfully processed %s cases", retry + 1, success_count)
+                if not failed_ids:
+                    break
                 
         # Update the failed IDs set
-        self.failed_ids = set(failed_ids)
-        with open("failed_ids.txt", "w") as f:
-            for doc_id in self.failed_ids:
-                f.write(f"{doc_id}\n")
+        # Recovered cases were already marked processed in the database
+        with self._lock:
+            self.failed_ids = failed_ids
+        self._q.join()
+        self.flush()
 
 if __name__ == "__main__":
     # Initialize scraper with conservative settings
     scraper = IndianKanoonScraper(
         max_workers=1,  # Single worker to avoid rate limiting
-        delay_range=(0.0, 3.0)  # Longer delays between requests
+        delay_range=(0.0, 3.0),  # Longer delays between requests
+        filename="all_cases.jsonl"
     )
     
     # For large-scale scraping, run in small batches
@@ -254,21 +561,21 @@ if __name__ == "__main__":
     # Process cases in batches with breaks between batches
     for batch_start in range(1, total_cases + 1, batch_size):
         batch_end = min(batch_start + batch_size - 1, total_cases)
-        logger.info(f"🚀 Processing batch {batch_start} to {batch_end}")
+        logger.info("🚀 Processing batch %s to %s", batch_start, batch_end)
         
         try:
-            scraper.save_cases(batch_start, batch_end, "all_cases.txt")
+            scraper.save_cases(batch_start, batch_end)
             
             # Take a break between batches
             break_time = random.uniform(10, 20)
-            logger.info(f"☕ Taking a break for {break_time:.1f} seconds between batches...")
+            logger.info("☕ Taking a break for %.1f seconds between batches...", break_time)
             time.sleep(0.1)
             
         except Exception as e:
-            logger.error(f"❌ Error processing batch {batch_start}-{batch_end}: {e}")
+            logger.error("❌ Error processing batch %s-%s: %s", batch_start, batch_end, e)
             # Longer wait if we hit an error
             time.sleep(120)
     
     # Retry failed cases at the end
     logger.info("🔄 Starting retry of failed cases")
-    scraper.retry_failed_cases("all_cases.txt")
+    scraper.retry_failed_cases()
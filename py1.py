@@ -1,9 +1,24 @@
-filename = "all_cases.txt"
+import io
+import os
+import orjson
+import zstandard as zstd
 
+filename = "all_cases.jsonl.zst"
+# Cases scraped before the JSON Lines format; their IDs are already marked
+# processed, so they are never re-fetched into the compressed file
+legacy_filename = "all_cases.txt"
 
-with open(filename, "r") as f:
-    text = f.read()
-    words = text.split()
-    word_count = len(words)
+
+word_count = 0
+
+if os.path.exists(legacy_filename):
+    with open(legacy_filename, "r", encoding="utf-8") as f:
+        for line in f:
+            word_count += len(line.split())
+
+if os.path.exists(filename):
+    with open(filename, "rb") as fh:
+        reader = zstd.ZstdDecompressor().stream_reader(fh, read_across_frames=True)
+        word_count += sum(len(orjson.loads(line)["text"].split()) for line in io.BufferedReader(reader))
 
 print("Number of words:", word_count)